@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from rag.generator import NepalLegalRAG
 from dotenv import load_dotenv
 import os
+import asyncio
+import hashlib
+import json
+from cachetools import TTLCache
 
 load_dotenv() 
 
@@ -13,6 +18,8 @@ if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY environment variable not set")
 
 rag_instance = NepalLegalRAG(groq_api_key=GROQ_API_KEY)
+answer_cache = TTLCache(maxsize=1024, ttl=3600)
+ACTS: List[str] = []
 class QuestionRequest(BaseModel):
     question: str = Field(..., description="Legal question in Nepali or English")
     act_name: Optional[str] = Field(None, description="Specific act name to filter results")
@@ -28,6 +35,8 @@ class QuestionRequest(BaseModel):
         }
 
 class DocumentMetadata(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     act_name: Optional[str] = None
     dapha_no: Optional[str] = None
     part: Optional[str] = None
@@ -54,42 +63,65 @@ class ActsListResponse(BaseModel):
     acts: List[str]
     total: int
 
+_METADATA_FIELDS = frozenset(DocumentMetadata.model_fields)
+
 def cast_metadata_to_str(metadata: dict) -> DocumentMetadata:
-    return DocumentMetadata(
-        act_name=str(metadata.get("act_name")) if metadata.get("act_name") is not None else None,
-        dapha_no=str(metadata.get("dapha_no")) if metadata.get("dapha_no") is not None else None,
-        part=str(metadata.get("part")) if metadata.get("part") is not None else None,
-        chapter=str(metadata.get("chapter")) if metadata.get("chapter") is not None else None,
-        page_no=str(metadata.get("page_no")) if metadata.get("page_no") is not None else None,
-        citation=str(metadata.get("citation")) if metadata.get("citation") is not None else None,
-    )
+    return DocumentMetadata.model_construct(**{
+        k: str(v) for k, v in metadata.items() if v is not None and k in _METADATA_FIELDS
+    })
+
+def answer_cache_key(question: str, act_name: Optional[str], top_k: int) -> bytes:
+    return hashlib.blake2b(f"{question}|{act_name}|{top_k}".encode(), digest_size=16).digest()
+
+def cached_json_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+def load_available_acts():
+    result = rag_instance.retriever.vector_store._collection.get(include=["metadatas"])
+    ACTS[:] = sorted({m["act_name"] for m in result["metadatas"] if m and m.get("act_name")})
+    print(f"Loaded {len(ACTS)} acts")
 
 @router.post("/ask", response_model=AnswerResponse)
-async def ask_legal_question(request: QuestionRequest):
+async def ask_legal_question(request: QuestionRequest, if_none_match: Optional[str] = Header(None)):
+    key = answer_cache_key(request.question, request.act_name, request.top_k)
+    etag = f'"{key.hex()}"'
+    body = answer_cache.get(key)
+    if body is not None:
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return cached_json_response(body, etag)
+
     try:
-        if request.top_k != rag_instance.retriever.top_k:
-            rag_instance.retriever.top_k = request.top_k
+        question_embedding = await asyncio.to_thread(rag_instance.embed_question, request.question)
+        cached = rag_instance.cache.lookup(question_embedding, request.top_k) if request.act_name is None else None
         
-        retrieved_docs = rag_instance.retrieve_context(
-            request.question,
-            act_name=request.act_name
-        )
-        
-        if not retrieved_docs:
-            raise HTTPException(
-                status_code=404,
-                detail="No relevant legal documents found for your question"
+        if cached:
+            answer_text, retrieved_docs = cached
+        else:
+            retrieved_docs = await rag_instance.aretrieve_context(
+                request.question,
+                act_name=request.act_name,
+                top_k=request.top_k
             )
-        
-        context = rag_instance.format_context(retrieved_docs)
-        answer_text = ""
-        for chunk in rag_instance.chain.stream(
-            {"context": context, "question": request.question}
-        ):
-            answer_text += chunk
-        
-        if "दफा" not in answer_text and "Section" not in answer_text:
-            answer_text += "\n\n⚠️ Note: Insufficient legal context available in the retrieved documents."
+            
+            if not retrieved_docs:
+                raise HTTPException(
+                    status_code=404,
+                    detail="No relevant legal documents found for your question"
+                )
+            
+            context = rag_instance.format_context(retrieved_docs)
+            answer_text = ""
+            async for chunk in rag_instance.chain.astream(
+                {"context": context, "question": request.question}
+            ):
+                answer_text += chunk
+            
+            if "दफा" not in answer_text and "Section" not in answer_text:
+                answer_text += "\n\n⚠️ Note: Insufficient legal context available in the retrieved documents."
+            
+            if request.act_name is None:
+                rag_instance.cache.insert(question_embedding, answer_text, retrieved_docs, request.top_k)
         
         formatted_docs = [
             RetrievedDocument(
@@ -99,16 +131,64 @@ async def ask_legal_question(request: QuestionRequest):
             for doc in retrieved_docs
         ]
         
-        return AnswerResponse(
+        body = AnswerResponse(
             question=request.question,
             answer=answer_text,
             retrieved_documents=formatted_docs,
             total_documents=len(formatted_docs)
-        )
+        ).model_dump_json().encode()
+        answer_cache[key] = body
+        return cached_json_response(body, etag)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating answer: {str(e)}")
 
+@router.post("/ask/stream")
+async def ask_legal_question_stream(request: QuestionRequest):
+    question_embedding = await asyncio.to_thread(rag_instance.embed_question, request.question)
+    cached = rag_instance.cache.lookup(question_embedding, request.top_k) if request.act_name is None else None
+
+    if cached:
+        retrieved_docs = cached[1]
+    else:
+        retrieved_docs = await rag_instance.aretrieve_context(
+            request.question,
+            act_name=request.act_name,
+            top_k=request.top_k
+        )
+        if not retrieved_docs:
+            raise HTTPException(
+                status_code=404,
+                detail="No relevant legal documents found for your question"
+            )
+
+    async def event_stream():
+        if cached:
+            yield f"data: {json.dumps({'delta': cached[0]}, ensure_ascii=False)}\n\n"
+            return
+
+        context = rag_instance.format_context(retrieved_docs)
+        answer_text = ""
+        try:
+            async for chunk in rag_instance.chain.astream(
+                {"context": context, "question": request.question}
+            ):
+                answer_text += chunk
+                yield f"data: {json.dumps({'delta': chunk}, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)}, ensure_ascii=False)}\n\n"
+            return
+
+        if "दफा" not in answer_text and "Section" not in answer_text:
+            footer = "\n\n⚠️ Note: Insufficient legal context available in the retrieved documents."
+            answer_text += footer
+            yield f"data: {json.dumps({'delta': footer}, ensure_ascii=False)}\n\n"
+
+        if request.act_name is None:
+            rag_instance.cache.insert(question_embedding, answer_text, retrieved_docs, request.top_k)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.get("/retrieve", response_model=RetrieveResponse)
 async def retrieve_documents(
     query: str = Query(..., description="Search query"),
@@ -116,11 +196,7 @@ async def retrieve_documents(
     top_k: int = Query(5, ge=1, le=20, description="Number of documents to retrieve")
 ):
     try:
-        original_top_k = rag_instance.retriever.top_k
-        rag_instance.retriever.top_k = top_k
-        
-        retrieved_docs = rag_instance.retrieve_context(query, act_name=act_name)
-        rag_instance.retriever.top_k = original_top_k
+        retrieved_docs = await rag_instance.aretrieve_context(query, act_name=act_name, top_k=top_k)
         
         if not retrieved_docs:
             raise HTTPException(status_code=404, detail="No relevant documents found")
@@ -148,15 +224,10 @@ async def retrieve_documents(
 async def list_available_acts(query: Optional[str] = Query(None, description="Optional search query to find relevant acts")):
     try:
         if query:
-            retrieved_docs = rag_instance.retrieve_context(query)
+            needle = query.casefold()
+            acts = [act for act in ACTS if needle in act.casefold()]
         else:
-            retrieved_docs = rag_instance.retrieve_context("कानून")
-        
-        acts = sorted(set(
-            doc["metadata"].get("act_name", "")
-            for doc in retrieved_docs
-            if doc["metadata"].get("act_name")
-        ))
+            acts = ACTS
         
         return ActsListResponse(
             acts=acts,
@@ -168,7 +239,7 @@ async def list_available_acts(query: Optional[str] = Query(None, description="Op
 @router.get("/health")
 async def health_check():
     try:
-        test_docs = rag_instance.retrieve_context("test")
+        test_docs = await rag_instance.aretrieve_context("test")
         return {
             "status": "healthy",
             "message": "Nepal Legal RAG system is operational",
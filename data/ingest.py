@@ -1,80 +1,99 @@
 import os
 import re
-import time
-import requests
-from playwright.sync_api import sync_playwright
+import asyncio
+import aiofiles
+import httpx
+from selectolax.lexbor import LexborHTMLParser
 from urllib.parse import urljoin
 
-class NepalActsScraper:    
-    def __init__(self, save_dir="nepal_acts_pdf"):
+CATEGORY_LINK_SELECTOR = "td:not(:first-child) a.in-cell-link[href*='/category/']"
+PDF_LINK_SELECTOR = "a[href$='.pdf'], a:has(i.fa-file-pdf)"
+
+class NepalActsScraper:
+    def __init__(self, save_dir="nepal_acts_pdf", max_concurrency=8):
         self.save_dir = save_dir
         self.base_url = "https://lawcommission.gov.np/pages/alphabetical-index-of-acts/"
         self.root_url = "https://lawcommission.gov.np"
+        self.max_concurrency = max_concurrency
+        self.semaphore = None
         self.downloaded_files = set()
         self.total_downloaded = 0
-        
+
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir)
-        
+
         self.downloaded_files = set(os.listdir(self.save_dir))
-    
+
     @staticmethod
     def clean_filename(text):
         clean = re.sub(r'[\\/*?:"<>|]', "", text)
         return clean.replace(" ", "_").strip()
-    
+
     @staticmethod
     def extract_category_id(url):
         match = re.search(r"/category/(\d+)", url)
         return match.group(1) if match else None
-    
-    def download_pdf(self, url, filename):
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                path = os.path.join(self.save_dir, filename)
-                with open(path, "wb") as f:
-                    f.write(response.content)
+
+    @staticmethod
+    def create_client():
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30)
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3)
+        return httpx.AsyncClient(transport=transport, follow_redirects=True)
+
+    async def fetch_category_page(self, client, url):
+        async with self.semaphore:
+            response = await client.get(url, timeout=60)
+            response.raise_for_status()
+            return LexborHTMLParser(response.text)
+
+    async def download_pdf(self, client, url, filename):
+        async with self.semaphore:
+            path = os.path.join(self.save_dir, filename)
+            partial_path = f"{path}.part"
+            try:
+                async with client.stream("GET", url, timeout=60) as response:
+                    if response.status_code != 200:
+                        print(f"Failed: Status {response.status_code}")
+                        return False
+                    async with aiofiles.open(partial_path, "wb") as f:
+                        async for chunk in response.aiter_bytes(65536):
+                            await f.write(chunk)
+                os.replace(partial_path, path)
                 print(f"Downloaded: {filename}")
                 return True
-            else:
-                print(f"Failed: Status {response.status_code}")
+            except Exception as e:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                print(f"Error downloading: {e}")
                 return False
-        except Exception as e:
-            print(f"Error downloading: {e}")
-            return False
-    
-    def extract_categories_from_section(self, page, section_letters):
+
+    def extract_categories_from_section(self, tree, section_letters):
         print(f"\nExtracting sections: {', '.join(section_letters)}")
-        
-        all_rows = page.locator("table tr").all()
+
         category_map = {}
         current_section = None
-        
-        for row in all_rows:
-            header_span = row.locator("td strong span")
-            if header_span.count() > 0:
-                section_letter = header_span.first.inner_text().strip()
+
+        for row in tree.css("table tr"):
+            header_span = row.css_first("td strong span")
+            if header_span is not None:
+                section_letter = header_span.text().strip()
                 if section_letter in section_letters and len(section_letter) == 1:
                     current_section = section_letter
                     print(f"\nFound section: {current_section}")
                     continue
-            
+
             if current_section:
-                cells = row.locator("td").all()
-                if len(cells) >= 1:
-                    law_name = cells[0].inner_text().strip()
+                first_cell = row.css_first("td")
+                if first_cell is not None:
+                    law_name = first_cell.text().strip()
                     if law_name:
                         category_link = None
                         category_id = None
-                        for cell in cells[1:]:
-                            links = cell.locator("a.in-cell-link[href*='/category/']").all()
-                            if links:
-                                href = links[0].get_attribute("href")
-                                if href:
-                                    category_link = href if href.startswith('http') else urljoin(self.root_url, href)
-                                    category_id = self.extract_category_id(category_link)
-                                    break
+                        link = row.css_first(CATEGORY_LINK_SELECTOR)
+                        if link is not None:
+                            href = link.attributes["href"]
+                            category_link = href if href.startswith('http') else urljoin(self.root_url, href)
+                            category_id = self.extract_category_id(category_link)
                         if category_id and category_id not in category_map:
                             category_map[category_id] = {
                                 "url": category_link,
@@ -84,105 +103,104 @@ class NepalActsScraper:
                             print(f"{current_section} - {law_name}")
                         elif category_id:
                             print(f"Duplicate: {law_name}")
-        
+
         print(f"\nTotal unique categories found: {len(category_map)}")
         return category_map
-    
-    def scrape_category(self, page, category_id, category_info):
+
+    async def scrape_category(self, client, category_id, category_info):
         category_url = category_info['url']
         law_name = category_info['name']
         section = category_info['section']
-        
-        print(f"\n{'='*70}")
-        print(f"Section: {section} | Category {category_id}: {law_name}")
-        print(f"{'='*70}")
-        
+
+        print(f"\nSection: {section} | Category {category_id}: {law_name}")
+
         page_num = 1
         category_pdf_count = 0
-        
+
         while True:
             paged_url = f"{category_url.rstrip('/')}/?page={page_num}"
-            print(f"\n  Page {page_num}: {paged_url}")
-            
+            print(f"  Page {page_num}: {paged_url}")
+
             try:
-                page.goto(paged_url, wait_until="networkidle", timeout=60000)
-                time.sleep(2)
+                tree = await self.fetch_category_page(client, paged_url)
             except Exception as e:
                 print(f"Error loading page: {e}")
                 break
-            
-            rows = page.locator("table tr").all()
+
+            rows = tree.css("table tr")
             if not rows:
                 print(f"  No rows found on page {page_num}")
                 break
-            
-            new_pdf_found = False
-            
+
+            downloads = []
+
             for row in rows:
-                pdf_links = row.locator("a[href$='.pdf'], a:has(i.fa-file-pdf)").all()
-                if not pdf_links:
+                pdf_link = row.css_first(PDF_LINK_SELECTOR)
+                if pdf_link is None:
                     continue
-                
-                cells = row.locator("td").all()
+
+                cells = row.css("td")
                 if len(cells) < 2:
                     continue
-                
-                title = cells[1].inner_text().strip()
+
+                title = cells[1].text().strip()
                 if not title:
                     continue
-                
+
                 filename = f"{self.clean_filename(title)}.pdf"
-                
+
                 if filename in self.downloaded_files:
                     print(f"    ✓ Already exists: {filename}")
                     continue
-                
-                pdf_url = pdf_links[0].get_attribute("href")
+
+                pdf_url = pdf_link.attributes.get("href")
                 if pdf_url:
                     pdf_url = pdf_url if pdf_url.startswith("http") else urljoin(self.root_url, pdf_url)
                     print(f"    Downloading: {title}")
-                    
-                    if self.download_pdf(pdf_url, filename):
-                        self.downloaded_files.add(filename)
-                        self.total_downloaded += 1
-                        category_pdf_count += 1
-                        new_pdf_found = True
-                        time.sleep(1) 
-            
+                    self.downloaded_files.add(filename)
+                    downloads.append((filename, self.download_pdf(client, pdf_url, filename)))
+
+            results = await asyncio.gather(*[task for _, task in downloads], return_exceptions=True)
+            new_pdf_found = False
+            for (filename, _), result in zip(downloads, results):
+                if result is True:
+                    self.total_downloaded += 1
+                    category_pdf_count += 1
+                    new_pdf_found = True
+                else:
+                    self.downloaded_files.discard(filename)
+
             if not new_pdf_found:
-                print(f"  No new PDFs on page {page_num}, moving to next category")
+                print(f"  No new PDFs on page {page_num} of category {category_id}, moving to next category")
                 break
-            
+
             page_num += 1
-        
-        print(f"  Category complete: {category_pdf_count} PDFs downloaded")
+
+        print(f"  Category {category_id} complete: {category_pdf_count} PDFs downloaded")
         return category_pdf_count
-    
-    def scrape_sections(self, sections):
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
+
+    async def _scrape_sections(self, sections):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self.create_client() as client:
             print(f"{'='*70}")
             print(f"NEPAL ACTS PDF SCRAPER")
             print(f"{'='*70}")
             print(f"Target sections: {', '.join(sections)}")
             print(f"Save directory: {os.path.abspath(self.save_dir)}")
-            print(f"{'='*70}\n")            
+            print(f"{'='*70}\n")
             print(f"Navigating to {self.base_url}...")
-            page.goto(self.base_url, wait_until="networkidle", timeout=90000)
-            time.sleep(2)            
-            all_categories = self.extract_categories_from_section(page, sections)
-            
+            index_tree = await self.fetch_category_page(client, self.base_url)
+            all_categories = self.extract_categories_from_section(index_tree, sections)
+
             if len(all_categories) == 0:
                 print("ERROR: No categories found. Exiting.")
-                browser.close()
                 return
-            
-            for category_id, category_info in all_categories.items():
-                self.scrape_category(page, category_id, category_info)
-            
-            browser.close()            
+
+            await asyncio.gather(*[
+                self.scrape_category(client, category_id, category_info)
+                for category_id, category_info in all_categories.items()
+            ], return_exceptions=True)
+
             print(f"\n{'='*70}")
             print(f"SCRAPING COMPLETE")
             print(f"{'='*70}")
@@ -192,9 +210,12 @@ class NepalActsScraper:
             print(f"All PDFs saved in: {os.path.abspath(self.save_dir)}")
             print(f"{'='*70}\n")
 
+    def scrape_sections(self, sections):
+        asyncio.run(self._scrape_sections(sections))
+
 
 def main():
-    scraper = NepalActsScraper(save_dir="nepal_acts_pdf")    
+    scraper = NepalActsScraper(save_dir="nepal_acts_pdf")
     sections_to_scrape = ['अ', 'आ']
     scraper.scrape_sections(sections_to_scrape)
 
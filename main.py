@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 import uvicorn
-from controllers.rag_controller import router as legal_router
+from controllers.rag_controller import router as legal_router, rag_instance, load_available_acts
 
 app = FastAPI(
     title="Nepal Legal RAG API",
@@ -21,6 +21,15 @@ app.add_middleware(
 )
 
 app.include_router(legal_router)
+
+@app.on_event("startup")
+async def load_acts():
+    load_available_acts()
+
+@app.on_event("shutdown")
+async def save_semantic_cache():
+    rag_instance.cache.save()
+
 @app.get("/")
 async def root():
     return RedirectResponse(url="/docs")
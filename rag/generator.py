@@ -1,13 +1,17 @@
 import os
-from rag.retriever import Retriever
+from rag.retriever import Retriever, AsyncBatchingRetriever
+from rag.semantic_cache import SemanticCache
 from langchain_core.prompts import PromptTemplate
 from langchain_groq import ChatGroq
 from langchain_core.output_parsers import StrOutputParser
 from typing import List, Dict, Optional
 
 class NepalLegalRAG:
-    def __init__(self, groq_api_key: str, top_k: int = 5, temperature: float = 0.1):
+    def __init__(self, groq_api_key: str, top_k: int = 5, temperature: float = 0.1,
+                 cache_threshold: float = 0.92):
         self.retriever = Retriever(top_k=top_k)
+        self.batching_retriever = AsyncBatchingRetriever(self.retriever)
+        self.cache = SemanticCache(threshold=cache_threshold)
         self.llm = ChatGroq(
             model_name="llama-3.1-8b-instant",
             groq_api_key=groq_api_key,
@@ -45,22 +49,32 @@ Citations:
 """
         return PromptTemplate.from_template(template)
 
+    def embed_question(self, question: str) -> List[float]:
+        return self.retriever.embed(question)
+
     def retrieve_context(
         self,
         query: str,
-        act_name: Optional[str] = None
+        act_name: Optional[str] = None,
+        top_k: Optional[int] = None
     ) -> List[Dict]:
-        results = self.retriever.retrieve(query)
-        
-        docs = [
+        return self._to_context_docs(self.retriever.retrieve(query, k=top_k, act_name=act_name))
+
+    async def aretrieve_context(
+        self,
+        query: str,
+        act_name: Optional[str] = None,
+        top_k: Optional[int] = None
+    ) -> List[Dict]:
+        results = await self.batching_retriever.retrieve(query, k=top_k, act_name=act_name)
+        return self._to_context_docs(results)
+
+    @staticmethod
+    def _to_context_docs(results) -> List[Dict]:
+        return [
             {"content": d.page_content, "metadata": d.metadata}
             for d in results
         ]
-
-        if act_name:
-            docs = [d for d in docs if d["metadata"].get("act_name") == act_name]
-
-        return docs
         
     def format_context(self, retrieved_docs: List[Dict]) -> str:
         blocks = []
@@ -83,12 +97,19 @@ Legal Text:
         return "\n".join(blocks)
 
     def generate_answer(self, question: str):
+        question_embedding = self.embed_question(question)
+        cached = self.cache.lookup(question_embedding, self.retriever.top_k)
+        if cached:
+            print(cached[0])
+            return
+
         retrieved_docs = self.retrieve_context(question)
 
         if not retrieved_docs:
             print("Insufficient legal context available in the retrieved documents.")
             return
 
+        selected_act = None
         if "दफा" in question or "Section" in question:
             acts = sorted({
                 d["metadata"].get("act_name")
@@ -138,6 +159,10 @@ Legal Text:
 
         if "दफा" not in answer_text and "Section" not in answer_text:
             print("\n Insufficient legal context available in the retrieved documents.")
+            return
+
+        if selected_act is None:
+            self.cache.insert(question_embedding, answer_text, retrieved_docs, self.retriever.top_k)
 
 if __name__ == "__main__":
     GROQ_API_KEY = "gsk_..." 
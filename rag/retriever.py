@@ -1,20 +1,105 @@
-import os
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+import asyncio
+from typing import List, Optional
+from langchain_core.documents import Document
+from store.db import get_chroma_connection
 
-MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-PERSIST_DIR = os.path.join(os.getcwd(), "chroma_storage")
 COLLECTION_NAME = "vidhi_legal_acts"
 
 def get_vector_store():
-    embeddings = HuggingFaceEmbeddings(model_name=MODEL_NAME, model_kwargs={"device": "cpu"})
-    vector_store = Chroma(collection_name=COLLECTION_NAME, embedding_function=embeddings, persist_directory=PERSIST_DIR)
-    return vector_store
+    return get_chroma_connection(COLLECTION_NAME)
 
 class Retriever:
     def __init__(self, top_k=5):
         self.vector_store = get_vector_store()
+        self.embeddings = self.vector_store.embeddings
         self.top_k = top_k
 
-    def retrieve(self, query):
-        return self.vector_store.similarity_search(query, k=self.top_k)
+    def embed(self, query: str) -> List[float]:
+        return self.embeddings.embed_query(query)
+
+    def embed_many(self, queries: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_queries(queries)
+
+    @staticmethod
+    def _act_filter(act_name: Optional[str]):
+        return {"act_name": act_name} if act_name else None
+
+    def retrieve(self, query, k=None, act_name=None):
+        return self.vector_store.similarity_search_by_vector(
+            self.embed(query),
+            k=k or self.top_k,
+            filter=self._act_filter(act_name)
+        )
+
+    def retrieve_batch(self, queries: List[str], ks: Optional[List[int]] = None,
+                       act_names: Optional[List[Optional[str]]] = None) -> List[List[Document]]:
+        ks = [k or self.top_k for k in ks] if ks else [self.top_k] * len(queries)
+        act_names = act_names or [None] * len(queries)
+        embeddings = self.embed_many(queries)
+
+        groups = {}
+        for i, act_name in enumerate(act_names):
+            groups.setdefault(act_name, []).append(i)
+
+        documents = [None] * len(queries)
+        for act_name, indices in groups.items():
+            results = self.vector_store._collection.query(
+                query_embeddings=[embeddings[i] for i in indices],
+                n_results=max(ks[i] for i in indices),
+                where=self._act_filter(act_name),
+                include=["documents", "metadatas"]
+            )
+            for i, docs, metas in zip(indices, results["documents"], results["metadatas"]):
+                documents[i] = [
+                    Document(page_content=doc, metadata=meta or {})
+                    for doc, meta in zip(docs[:ks[i]], metas[:ks[i]])
+                ]
+        return documents
+
+class AsyncBatchingRetriever:
+    def __init__(self, retriever: Retriever, max_batch_size: int = 32, max_wait: float = 0.005):
+        self.retriever = retriever
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+
+    async def retrieve(self, query: str, k: Optional[int] = None,
+                       act_name: Optional[str] = None) -> List[Document]:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, k, act_name, future))
+        return await future
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            queries, ks, act_names, futures = zip(*batch)
+            try:
+                results = await asyncio.to_thread(
+                    self.retriever.retrieve_batch, list(queries), list(ks), list(act_names)
+                )
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future, docs in zip(futures, results):
+                if not future.done():
+                    future.set_result(docs)
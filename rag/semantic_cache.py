@@ -0,0 +1,309 @@
+import os
+import copy
+import pickle
+import threading
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import PCA
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+CACHE_DIR = os.path.join(os.getcwd(), "semantic_cache")
+EMBEDDING_DIM = 384
+SCAN_CHUNKS = 64
+
+if njit is not None:
+    @njit("Tuple((int64, float32))(float32[:, ::1], float32[::1], float32)",
+          parallel=True, fastmath=True, cache=True)
+    def best_above(mat, q, tau):
+        n, d = mat.shape
+        n_chunks = SCAN_CHUNKS
+        chunk = (n + n_chunks - 1) // n_chunks
+        chunk_idx = np.full(n_chunks, -1, dtype=np.int64)
+        chunk_val = np.full(n_chunks, tau, dtype=np.float32)
+        for c in prange(n_chunks):
+            local_idx = -1
+            local_val = tau
+            for i in range(c * chunk, min((c + 1) * chunk, n)):
+                score = np.float32(0.0)
+                for j in range(d):
+                    score += mat[i, j] * q[j]
+                if score >= tau and (local_idx < 0 or score > local_val):
+                    local_idx = i
+                    local_val = score
+            chunk_idx[c] = local_idx
+            chunk_val[c] = local_val
+
+        best_idx = -1
+        best_val = tau
+        for c in range(n_chunks):
+            if chunk_idx[c] >= 0 and (best_idx < 0 or chunk_val[c] > best_val):
+                best_idx = chunk_idx[c]
+                best_val = chunk_val[c]
+        return best_idx, best_val
+else:
+    best_above = None
+
+class SemanticCache:
+    def __init__(self, threshold: float = 0.92, dim: int = EMBEDDING_DIM, cache_dir: str = CACHE_DIR,
+                 max_elements: int = 100_000, ef_construction: int = 200, M: int = 16,
+                 n_regions: int = 64, min_threshold: float = 0.80, alpha: float = 0.1, margin: float = 0.02,
+                 pca_components: int = 128, pca_min_samples: int = 5000):
+        self.threshold = threshold
+        self.input_dim = dim
+        self.dim = dim
+        self.cache_dir = cache_dir
+        self.max_elements = max_elements
+        self.ef_construction = ef_construction
+        self.M = M
+        self.n_regions = n_regions
+        self.min_threshold = min_threshold
+        self.alpha = alpha
+        self.margin = margin
+        self.pca_components = pca_components
+        self.pca_min_samples = pca_min_samples
+        self.embeddings_path = os.path.join(cache_dir, "embeddings.npy")
+        self.entries_path = os.path.join(cache_dir, "entries.pkl")
+        self.index_path = os.path.join(cache_dir, "index.bin")
+        self.regions_path = os.path.join(cache_dir, "regions.pkl")
+        self.pca_path = os.path.join(cache_dir, "pca.npz")
+        self.pca_mean: Optional[np.ndarray] = None
+        self.pca_basis: Optional[np.ndarray] = None
+        self._load_pca()
+        self._matrix = np.empty((1024, self.dim), dtype=np.float32)
+        self.size = 0
+        self.entries: List[Tuple[str, List[Dict], int]] = []
+        self.index = self._create_index()
+        self.kmeans: Optional[MiniBatchKMeans] = None
+        self.region_thresholds = np.full(n_regions, threshold, dtype=np.float32)
+        self._clustered = 0
+        self._lock = threading.Lock()
+        self._refit_thread: Optional[threading.Thread] = None
+        self.load()
+
+    def _create_index(self, path: Optional[str] = None):
+        if hnswlib is None:
+            return None
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        if path:
+            index.load_index(path, max_elements=self.max_elements)
+        else:
+            index.init_index(max_elements=self.max_elements, ef_construction=self.ef_construction, M=self.M)
+        index.set_ef(50)
+        return index
+
+    @staticmethod
+    def normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _same_sources(cached_docs: List[Dict], retrieved_docs: List[Dict]) -> bool:
+        cached = {d["metadata"].get("chunk_id") or d["content"] for d in cached_docs}
+        fresh = {d["metadata"].get("chunk_id") or d["content"] for d in retrieved_docs}
+        if not cached or not fresh:
+            return False
+        return len(cached & fresh) / len(cached | fresh) >= 0.5
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.ascontiguousarray(matrix / np.maximum(norms, 1e-12), dtype=np.float32)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._matrix[:self.size]
+
+    def _project(self, embedding) -> np.ndarray:
+        vector = self.normalize(embedding)
+        if self.pca_basis is None:
+            return vector
+        return self.normalize((vector - self.pca_mean) @ self.pca_basis.T)
+
+    def _load_pca(self):
+        if not os.path.exists(self.pca_path):
+            return
+        pca = np.load(self.pca_path)
+        if pca["components"].shape[1] != self.input_dim:
+            return
+        self.pca_basis = np.ascontiguousarray(pca["components"], dtype=np.float32)
+        self.pca_mean = pca["mean"].astype(np.float32)
+        self.dim = len(self.pca_basis)
+
+    def _build_index(self, matrix: np.ndarray, max_elements: int):
+        if hnswlib is None:
+            return None
+        index = hnswlib.Index(space="cosine", dim=matrix.shape[1])
+        index.init_index(max_elements=max_elements, ef_construction=self.ef_construction, M=self.M)
+        index.set_ef(50)
+        index.add_items(matrix, np.arange(len(matrix)))
+        return index
+
+    def _refit(self, fit_pca: bool):
+        with self._lock:
+            n = self.size
+            clustered = self._clustered
+            raw = self._matrix[:n].copy() if fit_pca else self._matrix[clustered:n].copy()
+            kmeans = None if fit_pca else copy.deepcopy(self.kmeans)
+
+        if fit_pca:
+            pca = PCA(n_components=self.pca_components).fit(raw)
+            basis = np.ascontiguousarray(pca.components_, dtype=np.float32)
+            mean = pca.mean_.astype(np.float32)
+            projected = self._normalize_rows((raw - mean) @ basis.T)
+            max_elements = max(self.max_elements, 2 * n)
+            index = self._build_index(projected, max_elements)
+            kmeans = MiniBatchKMeans(n_clusters=self.n_regions, random_state=0, n_init=3).fit(projected)
+            thresholds = np.full(self.n_regions, self.threshold, dtype=np.float32)
+            with self._lock:
+                added = self._normalize_rows((self._matrix[n:self.size] - mean) @ basis.T)
+                matrix = np.empty((max(1024, 2 * self.size), len(basis)), dtype=np.float32)
+                matrix[:n] = projected
+                matrix[n:self.size] = added
+                if index is not None and len(added):
+                    if index.get_max_elements() < self.size:
+                        index.resize_index(2 * self.size)
+                    index.add_items(added, np.arange(n, self.size))
+                self.pca_basis, self.pca_mean, self.dim = basis, mean, len(basis)
+                self._matrix, self.index, self.max_elements = matrix, index, max_elements
+                self.kmeans, self.region_thresholds, self._clustered = kmeans, thresholds, n
+            return
+
+        if kmeans is None:
+            kmeans = MiniBatchKMeans(n_clusters=self.n_regions, random_state=0, n_init=3)
+        kmeans.partial_fit(raw)
+        with self._lock:
+            self.kmeans, self._clustered = kmeans, n
+
+    def _schedule_refit(self):
+        fit_pca = self.pca_basis is None and self.size >= self.pca_min_samples
+        if not fit_pca and self.size - self._clustered < self.n_regions:
+            return
+        if self._refit_thread is not None and self._refit_thread.is_alive():
+            return
+        self._refit_thread = threading.Thread(target=self._refit, args=(fit_pca,), daemon=True)
+        self._refit_thread.start()
+
+    def _nearest(self, query: np.ndarray, tau: float = -1.0) -> Tuple[int, float]:
+        if self.index is not None:
+            labels, distances = self.index.knn_query(query, k=1)
+            return int(labels[0][0]), 1.0 - float(distances[0][0])
+        if best_above is not None:
+            best, score = best_above(self.embeddings, np.ascontiguousarray(query), np.float32(tau))
+            return int(best), float(score)
+        scores = self.embeddings @ query
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def _region(self, query: np.ndarray) -> Optional[int]:
+        if self.kmeans is None:
+            return None
+        centers = self.kmeans.cluster_centers_
+        return int(np.argmin(((centers - query) ** 2).sum(axis=1)))
+
+    def _region_threshold(self, region: Optional[int]) -> float:
+        return self.threshold if region is None else float(self.region_thresholds[region])
+
+    def _update_threshold(self, region: Optional[int], score: float, matched: bool):
+        if region is None:
+            return
+        tau = float(self.region_thresholds[region])
+        if matched and score < tau:
+            tau = (1 - self.alpha) * tau + self.alpha * score
+        elif not matched and score >= tau - self.margin:
+            tau = (1 - self.alpha) * tau + self.alpha * min(1.0, score + self.margin)
+        self.region_thresholds[region] = min(max(tau, self.min_threshold), 0.99)
+
+    def lookup(self, embedding, top_k: int) -> Optional[Tuple[str, List[Dict]]]:
+        with self._lock:
+            if self.size == 0:
+                return None
+            query = self._project(embedding)
+            tau = self._region_threshold(self._region(query))
+            best, score = self._nearest(query, tau)
+            if best >= 0 and score >= tau:
+                answer_text, retrieved_docs, cached_k = self.entries[best]
+                if cached_k >= top_k:
+                    return answer_text, retrieved_docs[:top_k]
+            return None
+
+    def insert(self, embedding, answer_text: str, retrieved_docs: List[Dict], top_k: int):
+        with self._lock:
+            vector = self._project(embedding)
+            if self.size:
+                best, score = self._nearest(vector)
+                matched = self._same_sources(self.entries[best][1], retrieved_docs)
+                self._update_threshold(self._region(vector), score, matched)
+
+            if self.size == len(self._matrix):
+                grown = np.empty((2 * len(self._matrix), self.dim), dtype=np.float32)
+                grown[:self.size] = self.embeddings
+                self._matrix = grown
+            self._matrix[self.size] = vector
+            if self.index is not None:
+                if self.index.get_current_count() == self.index.get_max_elements():
+                    self.index.resize_index(2 * self.index.get_max_elements())
+                self.index.add_items(vector[None, :], [self.size])
+            self.size += 1
+            self.entries.append((answer_text, retrieved_docs, top_k))
+            self._schedule_refit()
+
+    def save(self):
+        if self._refit_thread is not None:
+            self._refit_thread.join()
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.save(self.embeddings_path, self.embeddings)
+        with open(self.entries_path, "wb") as f:
+            pickle.dump(self.entries, f)
+        with open(self.regions_path, "wb") as f:
+            pickle.dump({
+                "kmeans": self.kmeans,
+                "thresholds": self.region_thresholds,
+                "clustered": self._clustered
+            }, f)
+        if self.pca_basis is not None:
+            np.savez(self.pca_path, components=self.pca_basis, mean=self.pca_mean)
+        if self.index is not None:
+            self.index.save_index(self.index_path)
+
+    def load(self):
+        if not (os.path.exists(self.embeddings_path) and os.path.exists(self.entries_path)):
+            return
+        matrix = np.load(self.embeddings_path).astype(np.float32)
+        with open(self.entries_path, "rb") as f:
+            entries = pickle.load(f)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dim or len(matrix) != len(entries):
+            print(f"Ignoring incompatible semantic cache at {self.cache_dir}")
+            return
+        self._matrix = np.empty((max(1024, 2 * len(matrix)), self.dim), dtype=np.float32)
+        self._matrix[:len(matrix)] = matrix
+        self.size = len(matrix)
+        self.entries = [entry if len(entry) == 3 else (entry[0], entry[1], len(entry[1])) for entry in entries]
+        if os.path.exists(self.regions_path):
+            with open(self.regions_path, "rb") as f:
+                regions = pickle.load(f)
+            if len(regions["thresholds"]) == self.n_regions:
+                self.kmeans = regions["kmeans"]
+                self.region_thresholds = regions["thresholds"]
+                self._clustered = regions["clustered"]
+        if self.index is not None:
+            self.max_elements = max(self.max_elements, 2 * self.size)
+            if os.path.exists(self.index_path):
+                self.index = self._create_index(self.index_path)
+            if self.index.get_current_count() != self.size:
+                self.index = self._create_index()
+                self.index.add_items(self.embeddings, np.arange(self.size))
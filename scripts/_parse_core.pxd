@@ -0,0 +1,5 @@
+import cython
+
+@cython.locals(line=str, label=str, body=str, kind=str, in_page=cython.bint, anchor_found=cython.bint,
+               chunks=list, definitions=list, pending_parts=list, current_section_full_text=list)
+cpdef tuple parse_lines(object parser, str raw_text, dict act_metadata, object chunk_cls)
@@ -0,0 +1,226 @@
+from collections import defaultdict
+
+def parse_lines(parser, raw_text, act_metadata, chunk_cls):
+    match_page = parser.page_pattern.match
+    match_anchor = parser.anchor_pattern.match
+    match_section = parser.section_pattern.match
+    match_line = parser.line_pattern.match
+    clean_text = parser.clean_text
+    create_contextual_content = parser.create_contextual_content
+    generate_chunk_id = parser.generate_chunk_id
+    extract_cross_references = parser.extract_cross_references
+    is_definition_section = parser.is_definition_section
+    flush_continuation = parser.flush_continuation
+    act_id = act_metadata["act_identifier"]
+    
+    chunks = []
+    definitions = []
+    cross_references = defaultdict(list)
+    section_groups = defaultdict(list)
+    
+    current_part = "Main"
+    current_chapter = "General"
+    current_section_no = None
+    current_section_title = None
+    current_section_full_text = []
+    current_subsection_no = None
+    current_subsection_text = None
+    pending_parts = []
+    
+    anchor_found = False
+    parse_stats = {
+        "sections": 0,
+        "subsections": 0,
+        "clauses": 0,
+        "definitions": 0
+    }
+    
+    in_page = "--- PAGE" not in raw_text
+    page_no = 1
+    
+    for line in raw_text.split('\n'):
+        if line.startswith("--- PAGE "):
+            page_m = match_page(line)
+            if page_m:
+                page_no = int(page_m.group(1))
+                in_page = True
+                line = line[page_m.end():]
+        if not in_page:
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        
+        if not anchor_found:
+            if ("प्रस्तावना" in line or 
+                "परिभाषा" in line or
+                match_anchor(line) or
+                match_section(line)):
+                anchor_found = True
+            else:
+                continue
+        
+        line_m = match_line(line)
+        kind = line_m.lastgroup if line_m else None
+        if kind:
+            label = line_m.group(line_m.lastindex + 1)
+            body = line_m.group(line_m.lastindex + 2)
+        
+        if kind == "part":
+            current_part = f"भाग {label}: {clean_text(body)}"
+            continue
+        
+        if kind == "chapter":
+            current_chapter = f"परिच्छेद {label}: {clean_text(body)}"
+            continue
+        
+        if kind == "section":
+            current_section_no = label
+            current_section_title = clean_text(body)
+            current_section_full_text = [current_section_title]
+            current_subsection_no = None
+            current_subsection_text = None
+            
+            minimal, contextual = create_contextual_content(
+                current_section_title, current_section_no
+            )
+            
+            chunk_id = generate_chunk_id(act_id, current_section_no)
+            refs = extract_cross_references(current_section_title)
+            is_def = is_definition_section(current_section_title)
+            
+            chunk = chunk_cls(
+                content=minimal,
+                content_with_context=contextual,
+                metadata={
+                    "act_name": act_metadata["act_name"],
+                    "act_identifier": act_id,
+                    "part": current_part,
+                    "chapter": current_chapter,
+                    "dapha_no": current_section_no,
+                    "citation": f"{act_metadata['act_name']}, दफा {current_section_no}",
+                    "page_no": page_no,
+                    "type": "section",
+                    "is_definition": is_def,
+                    "cross_references": refs,
+                    "hierarchy_level": 1
+                },
+                chunk_id=chunk_id
+            )
+            
+            flush_continuation(chunks, pending_parts)
+            chunks.append(chunk)
+            section_groups[current_section_no].append(chunk)
+            parse_stats["sections"] += 1
+            
+            if is_def:
+                definitions.append(chunk_id)
+            
+            if refs:
+                cross_references[chunk_id] = refs
+            
+            continue
+        
+        if kind == "sub_section" and current_section_no:
+            current_subsection_no = label
+            current_subsection_text = clean_text(body)
+            current_section_full_text.append(f"({current_subsection_no}) {current_subsection_text}")
+            
+            minimal, contextual = create_contextual_content(
+                current_section_title, current_section_no,
+                current_subsection_text, current_subsection_no
+            )
+            
+            chunk_id = generate_chunk_id(act_id, current_section_no,
+                                         current_subsection_no)
+            refs = extract_cross_references(current_subsection_text)
+            
+            chunk = chunk_cls(
+                content=minimal,
+                content_with_context=contextual,
+                metadata={
+                    "act_name": act_metadata["act_name"],
+                    "act_identifier": act_id,
+                    "part": current_part,
+                    "chapter": current_chapter,
+                    "dapha_no": current_section_no,
+                    "sub_section_no": current_subsection_no,
+                    "citation": f"{act_metadata['act_name']}, दफा {current_section_no}({current_subsection_no})",
+                    "page_no": page_no,
+                    "type": "sub_section",
+                    "parent_section_title": current_section_title,
+                    "cross_references": refs,
+                    "hierarchy_level": 2
+                },
+                chunk_id=chunk_id
+            )
+            
+            flush_continuation(chunks, pending_parts)
+            chunks.append(chunk)
+            section_groups[current_section_no].append(chunk)
+            parse_stats["subsections"] += 1
+            
+            if refs:
+                cross_references[chunk_id] = refs
+            
+            continue
+        
+        if kind == "clause" and current_section_no:
+            khanda_label = label
+            khanda_text = clean_text(body)
+            current_section_full_text.append(f"({khanda_label}) {khanda_text}")
+            
+            minimal, contextual = create_contextual_content(
+                current_section_title, current_section_no,
+                current_subsection_text, current_subsection_no,
+                khanda_text, khanda_label
+            )
+            
+            chunk_id = generate_chunk_id(act_id, current_section_no,
+                                         current_subsection_no, khanda_label)
+            refs = extract_cross_references(khanda_text)
+            
+            citation_parts = [f"{act_metadata['act_name']}, दफा {current_section_no}"]
+            if current_subsection_no:
+                citation_parts.append(f"({current_subsection_no})")
+            citation_parts.append(f"({khanda_label})")
+            
+            chunk = chunk_cls(
+                content=minimal,
+                content_with_context=contextual,
+                metadata={
+                    "act_name": act_metadata["act_name"],
+                    "act_identifier": act_id,
+                    "part": current_part,
+                    "chapter": current_chapter,
+                    "dapha_no": current_section_no,
+                    "sub_section_no": current_subsection_no,
+                    "khanda_label": khanda_label,
+                    "citation": "".join(citation_parts),
+                    "page_no": page_no,
+                    "type": "clause",
+                    "parent_section_title": current_section_title,
+                    "cross_references": refs,
+                    "hierarchy_level": 3
+                },
+                chunk_id=chunk_id
+            )
+            
+            flush_continuation(chunks, pending_parts)
+            chunks.append(chunk)
+            section_groups[current_section_no].append(chunk)
+            parse_stats["clauses"] += 1
+            
+            if refs:
+                cross_references[chunk_id] = refs
+            
+            continue
+        
+        if chunks:
+            cleaned_line = clean_text(line)
+            pending_parts.append(cleaned_line)
+            current_section_full_text.append(cleaned_line)
+
+    flush_continuation(chunks, pending_parts)
+    
+    return chunks, definitions, cross_references, section_groups, parse_stats
@@ -1,60 +1,109 @@
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import pymupdf  
 from tqdm import tqdm 
 
 INPUT_DIR = "C:\\Users\\poudy\\Downloads\\license_RAG\\data\\nepal_acts_pdf"
 OUTPUT_DIR = "C:\\Users\\poudy\\Downloads\\license_RAG\\data\\ocr_texts"
-DPI = 300                  
+DPI = 200
+FALLBACK_DPI = 300
+BINARIZE_THRESHOLD = 180
+MIN_OCR_CONFIDENCE = 60
+OCR_PAGE_BATCH = 8
+CPU_COUNT = os.cpu_count() or 1
+TEXT_FLAGS = pymupdf.TEXT_MEDIABOX_CLIP
+
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-def is_pdf_digital(doc):
-    for page_num in range(min(3, len(doc))):
-        if len(doc[page_num].get_text().strip()) > 50:
-            return True
-    return False
-
-def extract_digital(pdf_path):
+def extract_digital(doc):
     text_content = []
-    doc = pymupdf.open(pdf_path)
-    for i, page in enumerate(doc):
-        page_text = page.get_text("text")
+    is_digital = False
+    for i in range(doc.page_count):
+        page_text = doc.load_page(i).get_text("text", flags=TEXT_FLAGS)
+        if not is_digital:
+            if len(page_text.strip()) > 50:
+                is_digital = True
+            elif i >= 2:
+                return None
         text_content.append(f"--- PAGE {i+1} ---\n{page_text}")
-    doc.close()
-    return "\n".join(text_content)
+    return "\n".join(text_content) if is_digital else None
+
+def binarize(image):
+    return image.point(lambda p: 255 if p > BINARIZE_THRESHOLD else 0, mode='1')
+
+def ocr_image(image):
+    return pytesseract.image_to_string(binarize(image), lang='nep')
 
-def extract_scanned(pdf_path):
+def ocr_with_confidence(image):
+    text, tsv = pytesseract.run_and_get_multiple_output(binarize(image), extensions=['txt', 'tsv'], lang='nep')
+    rows = [line.split('\t') for line in tsv.splitlines()]
+    conf_col = rows[0].index('conf') if rows else 0
+    confidences = [float(row[conf_col]) for row in rows[1:] if len(row) > conf_col and float(row[conf_col]) >= 0]
+    return text, sum(confidences) / len(confidences) if confidences else 0.0
+
+def choose_dpi(pdf_path):
+    first_page = convert_from_path(pdf_path, dpi=DPI, first_page=1, last_page=1, grayscale=True)
+    if first_page:
+        text, confidence = ocr_with_confidence(first_page[0])
+        if confidence >= MIN_OCR_CONFIDENCE:
+            return DPI, text
+    return FALLBACK_DPI, None
+
+def extract_scanned(pdf_path, ocr_workers=1):
     text_content = []
-    images = convert_from_path(pdf_path, dpi=DPI)
-    for i, image in enumerate(images):
-        page_text = pytesseract.image_to_string(image, lang='nep')
-        text_content.append(f"--- PAGE {i+1} ---\n{page_text}")
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    dpi, first_page_text = choose_dpi(pdf_path)
+    start_page = 1
+    if first_page_text is not None:
+        text_content.append(f"--- PAGE 1 ---\n{first_page_text}")
+        start_page = 2
+    with ThreadPoolExecutor(max_workers=ocr_workers) as executor:
+        for first_page in range(start_page, page_count + 1, OCR_PAGE_BATCH):
+            last_page = min(first_page + OCR_PAGE_BATCH - 1, page_count)
+            images = convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page, grayscale=True)
+            for i, page_text in enumerate(executor.map(ocr_image, images), first_page):
+                text_content.append(f"--- PAGE {i} ---\n{page_text}")
     return "\n".join(text_content)
 
+def process_one(pdf_path, output_path, ocr_workers=1):
+    try:
+        doc = pymupdf.open(pdf_path)
+        try:
+            content = extract_digital(doc)
+        finally:
+            doc.close()
+        if content is None:
+            content = extract_scanned(pdf_path, ocr_workers)
+        
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return None
+            
+    except Exception as e:
+        return f"Error processing {os.path.basename(pdf_path)}: {e}"
+
 def process_all_acts():
     files = sorted([f for f in os.listdir(INPUT_DIR) if f.endswith('.pdf')])    
     print(f"Starting ingestion of {len(files)} files...")
     
-    for filename in tqdm(files):
-        pdf_path = os.path.join(INPUT_DIR, filename)
-        output_path = os.path.join(OUTPUT_DIR, filename.replace(".pdf", ".txt"))
-        
-        try:
-            doc = pymupdf.open(pdf_path)
-            if is_pdf_digital(doc):
-                content = extract_digital(pdf_path)
-            else:
-                content = extract_scanned(pdf_path)
-            doc.close()
-            
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(content)
-                
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
+    jobs = [
+        (os.path.join(INPUT_DIR, filename), os.path.join(OUTPUT_DIR, filename.replace(".pdf", ".txt")))
+        for filename in files
+    ]
+    
+    pdf_workers = max(1, min(CPU_COUNT, len(jobs)))
+    ocr_workers = max(1, CPU_COUNT // pdf_workers)
+    with ProcessPoolExecutor(max_workers=pdf_workers) as executor:
+        futures = [executor.submit(process_one, pdf_path, output_path, ocr_workers) for pdf_path, output_path in jobs]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            error = future.result()
+            if error:
+                print(error)
 
 if __name__ == "__main__":
     process_all_acts()
\ No newline at end of file
@@ -1,15 +1,53 @@
 import os
 import re
-import json
+import orjson
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, asdict
-from collections import defaultdict
+from dataclasses import dataclass
 import hashlib
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+try:
+    from scripts._parse_core import parse_lines
+except ImportError:
+    from _parse_core import parse_lines
+import numpy as np
+from numba import njit
 
 INPUT_DIR = r"C:\Users\poudy\Downloads\license_RAG\data\ocr_texts"
 OUTPUT_DIR = r"C:\Users\poudy\Downloads\license_RAG\data\parsed_json"
+READ_BUFFER_SIZE = 256 * 1024
 
-@dataclass
+SYMBOL_TABLE = str.maketrans('', '', '□▪▫●○◆◇■')
+_URL = r'www\.lawcommission\.gov\.np'
+_GAP = f'(?:{_URL})*'
+_GAZETTE = _GAP.join('नेपाल राजपत्र') + '.*?' + _GAP.join('भाग')
+DROP_RE = re.compile(
+    rf'^(?:\s|{_URL})*\d(?:\d|{_URL})*(?:\s|{_URL})*$|{_URL}|{_GAZETTE}',
+    re.IGNORECASE | re.MULTILINE
+)
+WS_RE = re.compile(r'\s+')
+PUNCT_RE = re.compile(r'\s*([।,])\s*')
+
+@lru_cache(maxsize=65536)
+def _clean_text(text: str) -> str:
+    if not text:
+        return ""
+    
+    text = DROP_RE.sub('', text.translate(SYMBOL_TABLE))
+    text = WS_RE.sub(' ', text)
+    text = PUNCT_RE.sub(r'\1 ', text)
+    
+    return text.strip()
+
+@njit(cache=True)
+def has_devanagari(buf) -> bool:
+    for i in range(buf.size - 1):
+        if buf[i] == 0xE0 and (buf[i + 1] == 0xA4 or buf[i + 1] == 0xA5):
+            return True
+    return False
+
+@dataclass(slots=True)
 class LegalChunk:
     content: str
     content_with_context: str
@@ -17,55 +55,56 @@ class LegalChunk:
     chunk_id: str
     
     def to_dict(self):
-        return asdict(self)
+        return {
+            "content": self.content,
+            "content_with_context": self.content_with_context,
+            "metadata": self.metadata,
+            "chunk_id": self.chunk_id
+        }
 
 class NepaliLegalParser:
     def __init__(self):
-        self.part_pattern = re.compile(r"भाग\s*[–\-]?\s*([\d१२३४५६७८९०]+)\s*(.*)")
-        self.chapter_pattern = re.compile(r"परिच्छेद\s*[–\-]?\s*([\d१२३४५६७८९०]+)\s*(.*)")
-        self.section_pattern = re.compile(r"^([\d१२३४५६७८९०]+)\.\s*(.*)")
-        self.sub_section_pattern = re.compile(r"^\(([\d१२३४५६७८९०]+)\)\s*(.*)")
+        self.part_pattern = re.compile(r"भाग\s*[–\-]?\s*(\d+)\s*(.*)")
+        self.chapter_pattern = re.compile(r"परिच्छेद\s*[–\-]?\s*(\d+)\s*(.*)")
+        self.section_pattern = re.compile(r"^(\d+)\.\s*(.*)")
+        self.sub_section_pattern = re.compile(r"^\((\d+)\)\s*(.*)")
         self.clause_pattern = re.compile(r"^\(([कखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसह]+)\)\s*(.*)")
-        
-        self.ref_patterns = [
-            re.compile(r"दफा\s*([\d१२३४५६७८९०]+)"),
-            re.compile(r"उपदफा\s*\(([\d१२३४५६७८९०]+)\)"),
-            re.compile(r"परिच्छेद\s*([\d१२३४५६७८९०]+)"),
-        ]
+        self.line_pattern = re.compile("|".join(
+            f"(?P<{kind}>{pattern.pattern})" for kind, pattern in [
+                ("part", self.part_pattern),
+                ("chapter", self.chapter_pattern),
+                ("section", self.section_pattern),
+                ("sub_section", self.sub_section_pattern),
+                ("clause", self.clause_pattern),
+            ]
+        ))
+        
+        self.ref_pattern = re.compile(
+            r"(?:दफा\s*|उपदफा\s*\((?=\d+\))|परिच्छेद\s*)(\d+)"
+        )
+        
+        self.date_pattern = re.compile(r"२०\d+")
+        self.preamble_pattern = re.compile(r"प्रस्तावना[:\s]+(.*?)(?=भाग|परिच्छेद|१\.)", re.DOTALL)
+        self.anchor_pattern = re.compile(r"^१\.")
+        self.page_pattern = re.compile(r"--- PAGE (\d+) ---")
         
         self.definition_markers = ["परिभाषा", "परिभाषाहरू", "शब्दार्थ"]
         self.schedule_markers = ["अनुसूची", "तफसिल"]
         
     def clean_text(self, text: str) -> str:
-        if not text:
-            return ""
-        
-        text = re.sub(r'[□▪▫●○◆◇■]', '', text)
-        text = re.sub(r'www\.lawcommission\.gov\.np', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^\s*\d+\s*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'नेपाल राजपत्र.*?भाग', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\s*([।,])\s*', r'\1 ', text)
-        
-        return text.strip()
+        return _clean_text(text)
     
     def get_act_metadata(self, file_path: str, text: str) -> Dict:
         base_name = os.path.basename(file_path)
         
-        try:
-            from urllib.parse import unquote
-            decoded_name = unquote(base_name, encoding='utf-8')
-            act_name = os.path.splitext(decoded_name)[0].replace('_', ' ').strip()
-        except:
-            act_name = os.path.splitext(base_name)[0].replace('_', ' ').strip()
+        decoded_name = unquote(base_name, encoding='utf-8') if '%' in base_name else base_name
+        act_name = os.path.splitext(decoded_name)[0].replace('_', ' ').strip()
         
-        date_pattern = re.compile(r"२०[\d०१२३४५६७८९]+")
-        dates = date_pattern.findall(text[:500])
+        dates = self.date_pattern.findall(text[:500])
         
         preamble = ""
         if "प्रस्तावना" in text[:1000]:
-            preamble_match = re.search(r"प्रस्तावना[:\s]+(.*?)(?=भाग|परिच्छेद|१\.)", 
-                                      text[:2000], re.DOTALL)
+            preamble_match = self.preamble_pattern.search(text[:2000])
             if preamble_match:
                 preamble = self.clean_text(preamble_match.group(1))
         
@@ -77,8 +116,10 @@ class NepaliLegalParser:
             "source_filename": base_name
         }
     
-    def generate_act_id(self, act_name: str) -> str:
-        return hashlib.md5(act_name.encode('utf-8')).hexdigest()[:8]
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def generate_act_id(act_name: str) -> str:
+        return hashlib.new('md5', act_name.encode('utf-8'), usedforsecurity=False).hexdigest()[:8]
     
     def generate_chunk_id(self, act_id: str, dapha: str, sub: str = None, 
                           khanda: str = None) -> str:
@@ -90,11 +131,7 @@ class NepaliLegalParser:
         return "_".join(parts)
     
     def extract_cross_references(self, text: str) -> List[str]:
-        references = []
-        for pattern in self.ref_patterns:
-            matches = pattern.findall(text)
-            references.extend(matches)
-        return list(set(references))
+        return list(set(self.ref_pattern.findall(text)))
     
     def is_definition_section(self, text: str) -> bool:
         return any(marker in text for marker in self.definition_markers)
@@ -124,225 +161,26 @@ class NepaliLegalParser:
         return minimal.strip(), contextual.strip()
     
     def parse_act(self, file_path: str) -> Tuple[List[LegalChunk], Dict]:
+        with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+            raw_bytes = f.read()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                raw_text = f.read()
+            raw_text = raw_bytes.decode('utf-8-sig')
         except UnicodeDecodeError:
-            try:
-                with open(file_path, 'r', encoding='utf-8-sig') as f:
-                    raw_text = f.read()
-            except:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    raw_text = f.read()
+            raw_text = raw_bytes.decode('latin-1')
+            raw_bytes = raw_text.encode('utf-8')
         
         act_metadata = self.get_act_metadata(file_path, raw_text)
-        act_id = act_metadata["act_identifier"]
-        
-        chunks = []
-        definitions = []
-        cross_references = defaultdict(list)
-        
-        current_part = "Main"
-        current_chapter = "General"
-        current_section_no = None
-        current_section_title = None
-        current_section_full_text = []
-        current_subsection_no = None
-        current_subsection_text = None
-        
-        anchor_found = False
-        parse_stats = {
-            "sections": 0,
-            "subsections": 0,
-            "clauses": 0,
-            "definitions": 0
-        }
-        
-        if "--- PAGE" in raw_text:
-            pages = re.split(r"--- PAGE (\d+) ---", raw_text)
-        else:
-            pages = ['', '1', raw_text]
-        
-        for i in range(1, len(pages), 2):
-            page_no = int(pages[i])
-            lines = pages[i+1].split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if not anchor_found:
-                    if ("प्रस्तावना" in line or 
-                        "परिभाषा" in line or
-                        re.match(r"^१\.", line) or
-                        self.section_pattern.match(line)):
-                        anchor_found = True
-                    else:
-                        continue
-                
-                p_m = self.part_pattern.match(line)
-                if p_m:
-                    current_part = f"भाग {p_m.group(1)}: {self.clean_text(p_m.group(2))}"
-                    continue
-                
-                c_m = self.chapter_pattern.match(line)
-                if c_m:
-                    current_chapter = f"परिच्छेद {c_m.group(1)}: {self.clean_text(c_m.group(2))}"
-                    continue
-                
-                s_m = self.section_pattern.match(line)
-                if s_m:
-                    current_section_no = s_m.group(1)
-                    current_section_title = self.clean_text(s_m.group(2))
-                    current_section_full_text = [current_section_title]
-                    current_subsection_no = None
-                    current_subsection_text = None
-                    
-                    minimal, contextual = self.create_contextual_content(
-                        current_section_title, current_section_no
-                    )
-                    
-                    chunk_id = self.generate_chunk_id(act_id, current_section_no)
-                    refs = self.extract_cross_references(current_section_title)
-                    is_def = self.is_definition_section(current_section_title)
-                    
-                    chunk = LegalChunk(
-                        content=minimal,
-                        content_with_context=contextual,
-                        metadata={
-                            "act_name": act_metadata["act_name"],
-                            "act_identifier": act_id,
-                            "part": current_part,
-                            "chapter": current_chapter,
-                            "dapha_no": current_section_no,
-                            "citation": f"{act_metadata['act_name']}, दफा {current_section_no}",
-                            "page_no": page_no,
-                            "type": "section",
-                            "is_definition": is_def,
-                            "cross_references": refs,
-                            "hierarchy_level": 1
-                        },
-                        chunk_id=chunk_id
-                    )
-                    
-                    chunks.append(chunk)
-                    parse_stats["sections"] += 1
-                    
-                    if is_def:
-                        definitions.append(chunk_id)
-                    
-                    if refs:
-                        cross_references[chunk_id] = refs
-                    
-                    continue
-                
-                sub_m = self.sub_section_pattern.match(line)
-                if sub_m and current_section_no:
-                    current_subsection_no = sub_m.group(1)
-                    current_subsection_text = self.clean_text(sub_m.group(2))
-                    current_section_full_text.append(f"({current_subsection_no}) {current_subsection_text}")
-                    
-                    minimal, contextual = self.create_contextual_content(
-                        current_section_title, current_section_no,
-                        current_subsection_text, current_subsection_no
-                    )
-                    
-                    chunk_id = self.generate_chunk_id(act_id, current_section_no, 
-                                                     current_subsection_no)
-                    refs = self.extract_cross_references(current_subsection_text)
-                    
-                    chunk = LegalChunk(
-                        content=minimal,
-                        content_with_context=contextual,
-                        metadata={
-                            "act_name": act_metadata["act_name"],
-                            "act_identifier": act_id,
-                            "part": current_part,
-                            "chapter": current_chapter,
-                            "dapha_no": current_section_no,
-                            "sub_section_no": current_subsection_no,
-                            "citation": f"{act_metadata['act_name']}, दफा {current_section_no}({current_subsection_no})",
-                            "page_no": page_no,
-                            "type": "sub_section",
-                            "parent_section_title": current_section_title,
-                            "cross_references": refs,
-                            "hierarchy_level": 2
-                        },
-                        chunk_id=chunk_id
-                    )
-                    
-                    chunks.append(chunk)
-                    parse_stats["subsections"] += 1
-                    
-                    if refs:
-                        cross_references[chunk_id] = refs
-                    
-                    continue
-                
-                k_m = self.clause_pattern.match(line)
-                if k_m and current_section_no:
-                    khanda_label = k_m.group(1)
-                    khanda_text = self.clean_text(k_m.group(2))
-                    current_section_full_text.append(f"({khanda_label}) {khanda_text}")
-                    
-                    minimal, contextual = self.create_contextual_content(
-                        current_section_title, current_section_no,
-                        current_subsection_text, current_subsection_no,
-                        khanda_text, khanda_label
-                    )
-                    
-                    chunk_id = self.generate_chunk_id(act_id, current_section_no,
-                                                     current_subsection_no, khanda_label)
-                    refs = self.extract_cross_references(khanda_text)
-                    
-                    citation_parts = [f"{act_metadata['act_name']}, दफा {current_section_no}"]
-                    if current_subsection_no:
-                        citation_parts.append(f"({current_subsection_no})")
-                    citation_parts.append(f"({khanda_label})")
-                    
-                    chunk = LegalChunk(
-                        content=minimal,
-                        content_with_context=contextual,
-                        metadata={
-                            "act_name": act_metadata["act_name"],
-                            "act_identifier": act_id,
-                            "part": current_part,
-                            "chapter": current_chapter,
-                            "dapha_no": current_section_no,
-                            "sub_section_no": current_subsection_no,
-                            "khanda_label": khanda_label,
-                            "citation": "".join(citation_parts),
-                            "page_no": page_no,
-                            "type": "clause",
-                            "parent_section_title": current_section_title,
-                            "cross_references": refs,
-                            "hierarchy_level": 3
-                        },
-                        chunk_id=chunk_id
-                    )
-                    
-                    chunks.append(chunk)
-                    parse_stats["clauses"] += 1
-                    
-                    if refs:
-                        cross_references[chunk_id] = refs
-                    
-                    continue
-                
-                if chunks:
-                    cleaned_line = self.clean_text(line)
-                    chunks[-1].content += " " + cleaned_line
-                    chunks[-1].content_with_context += " " + cleaned_line
-                    current_section_full_text.append(cleaned_line)
+        chunks, definitions, cross_references, section_groups, parse_stats = parse_lines(
+            self, raw_text, act_metadata, LegalChunk
+        )
         
         if chunks:
-            comprehensive_chunks = self.create_comprehensive_chunks(chunks, act_metadata)
+            comprehensive_chunks = self.create_comprehensive_chunks(section_groups, act_metadata)
             chunks.extend(comprehensive_chunks)
         
         parse_stats["definitions"] = len(definitions)
         
-        validation_issues = self.validate_parse_quality(chunks, parse_stats, raw_text)
+        validation_issues = self.validate_parse_quality(chunks, parse_stats, raw_bytes)
         
         metadata = {
             **act_metadata,
@@ -355,16 +193,20 @@ class NepaliLegalParser:
         
         return chunks, metadata
     
-    def create_comprehensive_chunks(self, chunks: List[LegalChunk], 
+    @staticmethod
+    def flush_continuation(chunks: List[LegalChunk], pending_parts: List[str]):
+        if not pending_parts:
+            return
+        tail = " " + " ".join(pending_parts)
+        chunks[-1].content += tail
+        chunks[-1].content_with_context += tail
+        pending_parts.clear()
+    
+    def create_comprehensive_chunks(self, section_groups: Dict[str, List[LegalChunk]], 
                                     act_metadata: Dict) -> List[LegalChunk]:
         comprehensive = []
-        sections = defaultdict(list)
-        
-        for chunk in chunks:
-            if chunk.metadata["type"] in ["section", "sub_section", "clause"]:
-                sections[chunk.metadata["dapha_no"]].append(chunk)
         
-        for dapha_no, section_chunks in sections.items():
+        for dapha_no, section_chunks in section_groups.items():
             if len(section_chunks) > 1:
                 full_content = "\n".join([c.content for c in section_chunks])
                 chunk_id = f"{act_metadata['act_identifier']}_{dapha_no}_full"
@@ -391,7 +233,7 @@ class NepaliLegalParser:
         return comprehensive
     
     def validate_parse_quality(self, chunks: List[LegalChunk], 
-                                stats: Dict, raw_text: str) -> List[str]:
+                                stats: Dict, raw_bytes: bytes) -> List[str]:
         issues = []
         
         if len(chunks) == 0:
@@ -412,18 +254,45 @@ class NepaliLegalParser:
             if ratio < 0.3:
                 issues.append(f"WARNING: Low sub-structure ratio ({ratio:.2f}) - may have missed content")
         
-        has_nepali = bool(re.search(r'[ऀ-ॿ]', raw_text))
+        has_nepali = has_devanagari(np.frombuffer(raw_bytes, dtype=np.uint8))
         if not has_nepali:
             issues.append("CRITICAL: No Devanagari text detected - wrong encoding or corrupted file")
         
         return issues
 
+def parse_one(filename: str) -> Tuple[Dict, bytes, Optional[Dict]]:
+    parser = NepaliLegalParser()
+    file_path = os.path.join(INPUT_DIR, filename)
+    
+    display_name = unquote(filename, encoding='utf-8') if '%' in filename else filename
+    
+    try:
+        chunks, metadata = parser.parse_act(file_path)
+        report = {
+            "file": filename,
+            "decoded_name": display_name,
+            "status": "success",
+            "chunks": len(chunks),
+            "statistics": metadata["parse_statistics"],
+            "issues": metadata["validation_issues"]
+        }
+        chunk_lines = b"".join(
+            orjson.dumps(chunk.to_dict(), option=orjson.OPT_APPEND_NEWLINE) for chunk in chunks
+        )
+        return report, chunk_lines, metadata
+        
+    except Exception as e:
+        return {
+            "file": filename,
+            "decoded_name": display_name,
+            "status": "failed",
+            "error": str(e)
+        }, b"", None
+
 def main():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
     
-    parser = NepaliLegalParser()
-    
     if not os.path.exists(INPUT_DIR):
         print(f"ERROR: Input directory not found: {INPUT_DIR}")
         return
@@ -434,39 +303,29 @@ def main():
         print(f"ERROR: No .txt files found in {INPUT_DIR}")
         return
     
-    all_chunks = []
+    total_chunks = 0
     all_metadata = []
     parsing_report = []
     
     print(f"Found {len(files)} files to parse\n")
     
-    for idx, filename in enumerate(files, 1):
-        file_path = os.path.join(INPUT_DIR, filename)
-        
-        try:
-            from urllib.parse import unquote
-            display_name = unquote(filename, encoding='utf-8')
-        except:
-            display_name = filename
-        
-        print(f"\n[{idx}/{len(files)}] Parsing: {display_name[:60]}...")
-        
-        try:
-            chunks, metadata = parser.parse_act(file_path)
-            all_chunks.extend([chunk.to_dict() for chunk in chunks])
-            all_metadata.append(metadata)            
-            report = {
-                "file": filename,
-                "decoded_name": display_name,
-                "status": "success",
-                "chunks": len(chunks),
-                "statistics": metadata["parse_statistics"],
-                "issues": metadata["validation_issues"]
-            }
+    chunks_file = os.path.join(OUTPUT_DIR, "vidhi_rag_enhanced.jsonl")
+    with open(chunks_file, 'wb') as out, ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(parse_one, files, chunksize=4)
+        for idx, (report, chunk_lines, metadata) in enumerate(results, 1):
+            print(f"\n[{idx}/{len(files)}] Parsing: {report['decoded_name'][:60]}...")
             parsing_report.append(report)
             
-            status = "done" if len(chunks) > 0 else "⚠"
-            print(f"  {status} {len(chunks)} chunks | "
+            if report["status"] == "failed":
+                print(f"  ✗ ERROR: {report['error']}")
+                continue
+            
+            out.write(chunk_lines)
+            total_chunks += report["chunks"]
+            all_metadata.append(metadata)
+            
+            status = "done" if report["chunks"] > 0 else "⚠"
+            print(f"  {status} {report['chunks']} chunks | "
                   f"Sections: {metadata['parse_statistics']['sections']} | "
                   f"Subsections: {metadata['parse_statistics']['subsections']} | "
                   f"Clauses: {metadata['parse_statistics']['clauses']}")
@@ -474,30 +333,17 @@ def main():
             if metadata["validation_issues"]:
                 for issue in metadata["validation_issues"][:2]:
                     print(f"    ⚠ {issue}")
-            
-        except Exception as e:
-            print(f"  ✗ ERROR: {str(e)}")
-            parsing_report.append({
-                "file": filename,
-                "decoded_name": display_name,
-                "status": "failed",
-                "error": str(e)
-            })
-    
-    chunks_file = os.path.join(OUTPUT_DIR, "vidhi_rag_enhanced.json")
-    with open(chunks_file, 'w', encoding='utf-8') as f:
-        json.dump(all_chunks, f, ensure_ascii=False, indent=2)
     
     metadata_file = os.path.join(OUTPUT_DIR, "acts_metadata.json")
-    with open(metadata_file, 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, ensure_ascii=False, indent=2)
+    with open(metadata_file, 'wb') as f:
+        f.write(orjson.dumps(all_metadata, option=orjson.OPT_INDENT_2))
     
     report_file = os.path.join(OUTPUT_DIR, "parsing_report.json")
-    with open(report_file, 'w', encoding='utf-8') as f:
-        json.dump(parsing_report, f, ensure_ascii=False, indent=2)
+    with open(report_file, 'wb') as f:
+        f.write(orjson.dumps(parsing_report, option=orjson.OPT_INDENT_2))
     
     print(f"PARSING COMPLETE")
-    print(f"Total chunks indexed: {len(all_chunks)}")
+    print(f"Total chunks indexed: {total_chunks}")
     print(f"Acts processed: {len(all_metadata)}")
     print(f"Successful parses: {sum(1 for r in parsing_report if r['status'] == 'success')}")
     print(f"Failed parses: {sum(1 for r in parsing_report if r['status'] == 'failed')}")
@@ -1,10 +1,19 @@
 import os
 import re
-import time
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from playwright.sync_api import sync_playwright
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from selectolax.lexbor import LexborHTMLParser
 from urllib.parse import urljoin
 
+DOWNLOAD_WORKERS = 8
+CATEGORY_LINK_SELECTOR = "td:not(:first-child) a.in-cell-link[href*='/category/']"
+PDF_LINK_SELECTOR = "a[href$='.pdf'], a:has(i.fa-file-pdf)"
+
 class NepalActsScraper:    
     def __init__(self, save_dir="nepal_acts_pdf"):
         self.save_dir = save_dir
@@ -12,6 +21,15 @@ class NepalActsScraper:
         self.root_url = "https://lawcommission.gov.np"
         self.downloaded_files = set()
         self.total_downloaded = 0
+        self.lock = threading.Lock()
+        self.executor = None
+        self.futures = []
+        self.categories_processed = 0
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS + 1,
+                              max_retries=Retry(total=3, backoff_factor=0.5))
+        self.session.mount("https://", adapter)
         
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir)
@@ -29,52 +47,54 @@ class NepalActsScraper:
         return match.group(1) if match else None
     
     def download_pdf(self, url, filename):
+        path = os.path.join(self.save_dir, filename)
+        partial_path = f"{path}.part"
         try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                path = os.path.join(self.save_dir, filename)
-                with open(path, "wb") as f:
-                    f.write(response.content)
-                print(f"Downloaded: {filename}")
-                return True
-            else:
+            with self.session.get(url, timeout=30, stream=True) as response:
+                if response.status_code == 200:
+                    response.raw.decode_content = True
+                    with open(partial_path, "wb") as f:
+                        shutil.copyfileobj(response.raw, f, length=262144)
+                    os.replace(partial_path, path)
+                    print(f"Downloaded: {filename}")
+                    return True
                 print(f"Failed: Status {response.status_code}")
-                return False
         except Exception as e:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
             print(f"Error downloading: {e}")
-            return False
+        with self.lock:
+            self.downloaded_files.discard(filename)
+        return False
     
     def extract_categories_from_section(self, page, section_letters):
         print(f"\nExtracting sections: {', '.join(section_letters)}")
         
-        all_rows = page.locator("table tr").all()
+        tree = LexborHTMLParser(page.content())
         category_map = {}
         current_section = None
         
-        for row in all_rows:
-            header_span = row.locator("td strong span")
-            if header_span.count() > 0:
-                section_letter = header_span.first.inner_text().strip()
+        for row in tree.css("table tr"):
+            header_span = row.css_first("td strong span")
+            if header_span is not None:
+                section_letter = header_span.text().strip()
                 if section_letter in section_letters and len(section_letter) == 1:
                     current_section = section_letter
                     print(f"\nFound section: {current_section}")
                     continue
             
             if current_section:
-                cells = row.locator("td").all()
-                if len(cells) >= 1:
-                    law_name = cells[0].inner_text().strip()
+                first_cell = row.css_first("td")
+                if first_cell is not None:
+                    law_name = first_cell.text().strip()
                     if law_name:
                         category_link = None
                         category_id = None
-                        for cell in cells[1:]:
-                            links = cell.locator("a.in-cell-link[href*='/category/']").all()
-                            if links:
-                                href = links[0].get_attribute("href")
-                                if href:
-                                    category_link = href if href.startswith('http') else urljoin(self.root_url, href)
-                                    category_id = self.extract_category_id(category_link)
-                                    break
+                        link = row.css_first(CATEGORY_LINK_SELECTOR)
+                        if link is not None:
+                            href = link.attributes["href"]
+                            category_link = href if href.startswith('http') else urljoin(self.root_url, href)
+                            category_id = self.extract_category_id(category_link)
                         if category_id and category_id not in category_map:
                             category_map[category_id] = {
                                 "url": category_link,
@@ -88,7 +108,23 @@ class NepalActsScraper:
         print(f"\nTotal unique categories found: {len(category_map)}")
         return category_map
     
-    def scrape_category(self, page, category_id, category_info):
+    def load_index_page(self, page, retries=1):
+        for attempt in range(retries + 1):
+            try:
+                page.goto(self.base_url, wait_until="domcontentloaded", timeout=30000)
+                page.wait_for_selector("table tr", timeout=10000)
+                return
+            except PlaywrightTimeoutError:
+                if attempt == retries:
+                    raise
+                print("Timed out loading index page, retrying...")
+    
+    def fetch_category_page(self, url):
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        return LexborHTMLParser(response.content)
+    
+    def scrape_category(self, category_id, category_info):
         category_url = category_info['url']
         law_name = category_info['name']
         section = category_info['section']
@@ -105,13 +141,12 @@ class NepalActsScraper:
             print(f"\n  Page {page_num}: {paged_url}")
             
             try:
-                page.goto(paged_url, wait_until="networkidle", timeout=60000)
-                time.sleep(2)
+                tree = self.fetch_category_page(paged_url)
             except Exception as e:
                 print(f"Error loading page: {e}")
                 break
             
-            rows = page.locator("table tr").all()
+            rows = tree.css("table tr")
             if not rows:
                 print(f"  No rows found on page {page_num}")
                 break
@@ -119,35 +154,35 @@ class NepalActsScraper:
             new_pdf_found = False
             
             for row in rows:
-                pdf_links = row.locator("a[href$='.pdf'], a:has(i.fa-file-pdf)").all()
-                if not pdf_links:
+                pdf_link = row.css_first(PDF_LINK_SELECTOR)
+                if pdf_link is None:
                     continue
                 
-                cells = row.locator("td").all()
+                cells = row.css("td")
                 if len(cells) < 2:
                     continue
                 
-                title = cells[1].inner_text().strip()
+                title = cells[1].text().strip()
                 if not title:
                     continue
                 
                 filename = f"{self.clean_filename(title)}.pdf"
                 
-                if filename in self.downloaded_files:
+                with self.lock:
+                    already_exists = filename in self.downloaded_files
+                if already_exists:
                     print(f"    ✓ Already exists: {filename}")
                     continue
                 
-                pdf_url = pdf_links[0].get_attribute("href")
+                pdf_url = pdf_link.attributes.get("href")
                 if pdf_url:
                     pdf_url = pdf_url if pdf_url.startswith("http") else urljoin(self.root_url, pdf_url)
-                    print(f"    Downloading: {title}")
-                    
-                    if self.download_pdf(pdf_url, filename):
+                    print(f"    Queued: {title}")
+                    with self.lock:
                         self.downloaded_files.add(filename)
-                        self.total_downloaded += 1
-                        category_pdf_count += 1
-                        new_pdf_found = True
-                        time.sleep(1) 
+                    self.futures.append(self.executor.submit(self.download_pdf, pdf_url, filename))
+                    category_pdf_count += 1
+                    new_pdf_found = True
             
             if not new_pdf_found:
                 print(f"  No new PDFs on page {page_num}, moving to next category")
@@ -155,10 +190,21 @@ class NepalActsScraper:
             
             page_num += 1
         
-        print(f"  Category complete: {category_pdf_count} PDFs downloaded")
+        print(f"  Category complete: {category_pdf_count} PDFs queued")
         return category_pdf_count
     
     def scrape_sections(self, sections):
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            self.executor = executor
+            self.futures = []
+            if not self._scrape_sections(sections):
+                return
+            for future in as_completed(self.futures):
+                if future.result():
+                    self.total_downloaded += 1
+        self._print_summary(sections)
+    
+    def _scrape_sections(self, sections):
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=True)
             page = browser.new_page()
@@ -170,27 +216,30 @@ class NepalActsScraper:
             print(f"Save directory: {os.path.abspath(self.save_dir)}")
             print(f"{'='*70}\n")            
             print(f"Navigating to {self.base_url}...")
-            page.goto(self.base_url, wait_until="networkidle", timeout=90000)
-            time.sleep(2)            
+            self.load_index_page(page)            
             all_categories = self.extract_categories_from_section(page, sections)
             
             if len(all_categories) == 0:
                 print("ERROR: No categories found. Exiting.")
                 browser.close()
-                return
+                return False
             
             for category_id, category_info in all_categories.items():
-                self.scrape_category(page, category_id, category_info)
+                self.scrape_category(category_id, category_info)
             
-            browser.close()            
-            print(f"\n{'='*70}")
-            print(f"SCRAPING COMPLETE")
-            print(f"{'='*70}")
-            print(f"Sections scraped: {', '.join(sections)}")
-            print(f"Total categories processed: {len(all_categories)}")
-            print(f"Total PDFs downloaded: {self.total_downloaded}")
-            print(f"All PDFs saved in: {os.path.abspath(self.save_dir)}")
-            print(f"{'='*70}\n")
+            browser.close()
+            self.categories_processed = len(all_categories)
+            return True
+    
+    def _print_summary(self, sections):
+        print(f"\n{'='*70}")
+        print(f"SCRAPING COMPLETE")
+        print(f"{'='*70}")
+        print(f"Sections scraped: {', '.join(sections)}")
+        print(f"Total categories processed: {self.categories_processed}")
+        print(f"Total PDFs downloaded: {self.total_downloaded}")
+        print(f"All PDFs saved in: {os.path.abspath(self.save_dir)}")
+        print(f"{'='*70}\n")
 
 
 def main():
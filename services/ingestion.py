@@ -1,11 +1,107 @@
-import json
 import os
+import hashlib
+import orjson
 import shutil  
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import numpy as np
+from tqdm import tqdm
 from langchain_core.documents import Document
-from store.db import get_chroma_connection 
+from store.db import flush_vector_index, get_chroma_connection, set_embedding_threads 
+from store.embeddings import EMBEDDING_DIM
 
-DATA_PATH = r"C:\Users\poudy\Downloads\license_RAG\data\parsed_json\vidhi_rag_enhanced.json"
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DATA_PATH = r"C:\Users\poudy\Downloads\license_RAG\data\parsed_json\vidhi_rag_enhanced.jsonl"
+PARQUET_PATH = os.path.splitext(DATA_PATH)[0] + ".parquet"
 CHROMA_PATH = "chroma_storage"
+INGEST_WORKERS = 4
+EMBED_BATCH_SIZE = 32
+ADD_BATCH_SIZE = 5000
+MIN_CONTENT_LENGTH = 10
+
+def iter_chunks(path=DATA_PATH):
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+def build_parquet(path=DATA_PATH, parquet_path=PARQUET_PATH):
+    schema = pa.schema([("chunk_id", pa.string()), ("content", pa.string()), ("metadata_json", pa.string())])
+    chunks = iter_chunks(path)
+    partial_path = f"{parquet_path}.part"
+    try:
+        with pq.ParquetWriter(partial_path, schema, compression="snappy") as writer:
+            while True:
+                window = list(islice(chunks, ADD_BATCH_SIZE))
+                if not window:
+                    break
+                writer.write_table(pa.table({
+                    "chunk_id": [item.get("chunk_id", "unknown") for item in window],
+                    "content": [item.get("content_with_context") or item.get("content") for item in window],
+                    "metadata_json": [orjson.dumps(item.get("metadata", {})).decode() for item in window]
+                }, schema=schema))
+        os.replace(partial_path, parquet_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+def iter_parquet_chunks(parquet_path=PARQUET_PATH):
+    parquet_file = pq.ParquetFile(parquet_path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=ADD_BATCH_SIZE):
+        columns = batch.to_pydict()
+        for chunk_id, content, metadata_json in zip(columns["chunk_id"], columns["content"], columns["metadata_json"]):
+            yield {"chunk_id": chunk_id, "content": content, "metadata": orjson.loads(metadata_json)}
+
+def open_chunks():
+    if pq is None:
+        return count_chunks(), iter_chunks()
+    if not os.path.exists(PARQUET_PATH) or os.path.getmtime(PARQUET_PATH) < os.path.getmtime(DATA_PATH):
+        print(f"Converting {DATA_PATH} to Parquet at {PARQUET_PATH}...")
+        build_parquet()
+    return pq.ParquetFile(PARQUET_PATH).metadata.num_rows, iter_parquet_chunks()
+
+def iter_unique_documents(chunks, skipped):
+    seen = set()
+    for item in chunks:
+        doc = to_document(item)
+        key = document_id(doc.metadata["chunk_id"], doc.page_content)
+        if key in seen:
+            skipped["duplicate"] += 1
+            continue
+        seen.add(key)
+        if len(doc.page_content) < MIN_CONTENT_LENGTH:
+            skipped["short"] += 1
+            continue
+        yield doc
+
+def count_chunks(path=DATA_PATH):
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+def _clean_meta(raw_metadata):
+    return {
+        key: ", ".join(map(str, value)) if isinstance(value, list) else ("" if value is None else value)
+        for key, value in raw_metadata.items()
+    }
+
+def document_id(chunk_id, page_content):
+    return f"{chunk_id}_{hashlib.blake2b(page_content.encode('utf-8'), digest_size=8).hexdigest()}"
+
+def to_document(item):
+    page_content = item.get("content_with_context") or item.get("content") or "Empty Content"
+    cleaned_metadata = _clean_meta(item.get("metadata", {}))
+    cleaned_metadata["chunk_id"] = item.get("chunk_id", "unknown")
+
+    return Document.construct(
+        page_content=page_content,
+        metadata=cleaned_metadata
+    )
 
 def run_ingestion():
     if os.path.exists(CHROMA_PATH):
@@ -13,53 +109,54 @@ def run_ingestion():
         shutil.rmtree(CHROMA_PATH)
 
     if not os.path.exists(DATA_PATH):
-        print(f"Error: JSON file not found at {DATA_PATH}")
+        print(f"Error: JSONL file not found at {DATA_PATH}")
         return
 
-    print("Loading parsed legal data")
-    with open(DATA_PATH, 'r', encoding='utf-8') as f:
-        legal_chunks = json.load(f)
-    
-    langchain_docs = []
-    print(f"Preparing {len(legal_chunks)} chunks for vectorization...")
-    
-    for item in legal_chunks:
-        page_content = item.get("content_with_context") or item.get("content") or "Empty Content"        
-        raw_metadata = item.get("metadata", {})
-        cleaned_metadata = {}
-
-        for key, value in raw_metadata.items():
-            if isinstance(value, list):
-                cleaned_metadata[key] = ", ".join(map(str, value)) if value else ""
-            elif value is None:
-                cleaned_metadata[key] = ""
-            else:
-                cleaned_metadata[key] = value
-
-        cleaned_metadata["chunk_id"] = item.get("chunk_id", "unknown")
-
-        doc = Document(
-            page_content=page_content,
-            metadata=cleaned_metadata
-        )
-        langchain_docs.append(doc)
+    total_docs, chunks = open_chunks()
+    print(f"Preparing {total_docs} chunks for vectorization...")
 
     print("Connecting to Vector Store and loading Local Embedding Model...")
+    set_embedding_threads(max(1, (os.cpu_count() or 1) // INGEST_WORKERS))
     vector_store = get_chroma_connection()
-    
-    batch_size = 500 
-    total_docs = len(langchain_docs)
+
+    embeddings = vector_store.embeddings
+    collection = vector_store._collection
+    embed_batch_size = getattr(embeddings, "batch_size", EMBED_BATCH_SIZE)
     print(f"Starting ingestion of {total_docs} docs...")
-    
-    for i in range(0, total_docs, batch_size):
-        batch = langchain_docs[i:i + batch_size]
-        try:
-            vector_store.add_documents(batch)
-            percent = (min(i + batch_size, total_docs) / total_docs) * 100
-            print(f"Progress: {percent:.2f}% | Indexed: {min(i + batch_size, total_docs)}/{total_docs}")
-        except Exception as e:
-            print(f"Error in batch starting at index {i}: {e}")
 
+    skipped = {"duplicate": 0, "short": 0}
+    documents = iter_unique_documents(chunks, skipped)
+    indexed = 0
+    with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as executor, \
+            tqdm(total=total_docs, unit="docs", mininterval=1.0) as pbar:
+        while True:
+            batch = list(islice(documents, ADD_BATCH_SIZE))
+            if not batch:
+                break
+            batch.sort(key=lambda doc: len(doc.page_content))
+            texts = [doc.page_content for doc in batch]
+            try:
+                vectors = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+                starts = range(0, len(texts), embed_batch_size)
+                results = executor.map(embeddings.embed_documents, [texts[j:j + embed_batch_size] for j in starts])
+                for j, result in zip(starts, results):
+                    vectors[j:j + len(result)] = result
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+                collection.add(
+                    ids=[document_id(doc.metadata["chunk_id"], doc.page_content) for doc in batch],
+                    embeddings=vectors.tolist(),
+                    documents=texts,
+                    metadatas=[doc.metadata for doc in batch]
+                )
+            except Exception as e:
+                tqdm.write(f"Error in batch starting at index {indexed}: {e}")
+            indexed += len(batch)
+            pbar.update(indexed + skipped["duplicate"] + skipped["short"] - pbar.n)
+
+    print("Persisting vector index...")
+    flush_vector_index(vector_store)
+    print(f"Skipped {skipped['duplicate']} duplicate and {skipped['short']} short chunks")
     print("\nIngestion complete. Vidhi-AI production database is ready.")
 
 if __name__ == "__main__":
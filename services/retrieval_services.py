@@ -1,3 +1,4 @@
+import numpy as np
 from store.db import get_chroma_connection
 
 def test_search(query: str):
@@ -24,5 +25,20 @@ def test_search(query: str):
         content = doc.page_content.replace('\n', ' ').strip()
         print(f"Snippet:  {content[:250]}")
 
+def batch_search(queries, k=3):
+    if not queries:
+        return []
+    vector_store = get_chroma_connection()
+    embeddings = vector_store.embeddings
+    order = sorted(range(len(queries)), key=lambda i: len(queries[i]))
+    vectors = np.asarray(embeddings.embed_documents([queries[i] for i in order]),
+                         dtype=np.float32).reshape(len(order), -1)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+    results = [None] * len(queries)
+    for i, vector in zip(order, vectors):
+        results[i] = vector_store.similarity_search_by_vector(vector.tolist(), k=k)
+    return results
+
 if __name__ == "__main__":
     test_search("What are the penalties for driving without a license?")
\ No newline at end of file
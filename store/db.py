@@ -1,23 +1,104 @@
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
+from functools import lru_cache
+from typing import Optional
+import chromadb
 from langchain_chroma import Chroma
 from dotenv import load_dotenv
+from store.embeddings import CachedEmbeddings, MAX_SEQ_LENGTH, MODEL_NAME, OnnxEmbeddings
 
 load_dotenv()
 
-def get_chroma_connection(collection_name: str = "vidhi_legal_acts"):
-    model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-    
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")
+CPU_EMBED_BATCH_SIZE = 32
+GPU_EMBED_BATCH_SIZE = 256
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "1") == "1"
+_embedding_threads: Optional[int] = None
+COLLECTION_METADATA = {"hnsw:space": "ip", "hnsw:M": 16, "hnsw:construction_ef": 64, "hnsw:search_ef": 128,
+                       "hnsw:sync_threshold": 100000, "hnsw:batch_size": 500}
+
+def cpu_torch_dtype():
+    import torch
+    bf16_supported = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    if bf16_supported is not None and bf16_supported():
+        return torch.bfloat16
+    print("AVX512-BF16 not supported on this CPU, using fp32 embeddings")
+    return torch.float32
+
+def cuda_available():
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+def set_embedding_threads(num_threads: Optional[int]):
+    global _embedding_threads
+    _embedding_threads = num_threads
+
+@lru_cache(maxsize=None)
+def resolve_backend(backend: str = EMBEDDING_BACKEND):
+    if backend == "auto":
+        return "torch" if cuda_available() else "onnx"
+    return backend
+
+def get_embeddings(backend: str = EMBEDDING_BACKEND):
+    return _load_embeddings(resolve_backend(backend))
+
+@lru_cache(maxsize=None)
+def _load_embeddings(backend: str):
+    num_threads = _embedding_threads
+    if backend == "onnx":
+        return CachedEmbeddings(OnnxEmbeddings(model_name=MODEL_NAME, num_threads=num_threads),
+                                batch_size=CPU_EMBED_BATCH_SIZE)
+
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    batch_size = GPU_EMBED_BATCH_SIZE if device == "cuda" else CPU_EMBED_BATCH_SIZE
     embeddings = HuggingFaceEmbeddings(
-        model_name=model_name,
-        model_kwargs={'device': 'cpu'} 
+        model_name=MODEL_NAME,
+        model_kwargs={'device': device, 'model_kwargs': {
+            'torch_dtype': torch.float16 if device == "cuda" else cpu_torch_dtype()
+        }},
+        encode_kwargs={'batch_size': batch_size}
     )
-    
+    embeddings.client.max_seq_length = MAX_SEQ_LENGTH
+    if TORCH_COMPILE and hasattr(torch, "compile"):
+        transformer = embeddings.client[0]
+        transformer.auto_model = torch.compile(
+            transformer.auto_model,
+            mode="max-autotune-no-cudagraphs" if device == "cuda" else "default",
+            dynamic=True
+        )
+        embeddings.client.encode("warmup")
+    return CachedEmbeddings(embeddings, batch_size=batch_size)
+
+@lru_cache(maxsize=None)
+def get_chroma_connection(collection_name: str = "vidhi_legal_acts"):
     persist_directory = os.path.join(os.getcwd(), "chroma_storage")
+    client = chromadb.PersistentClient(path=persist_directory)
+
+    existing = next((c for c in client.list_collections() if c.name == collection_name), None)
+    backend = (existing.metadata or {}).get("embedding_backend") if existing else None
+    if backend is None:
+        backend = resolve_backend()
+    elif EMBEDDING_BACKEND != "auto" and EMBEDDING_BACKEND != backend:
+        print(f"EMBEDDING_BACKEND={EMBEDDING_BACKEND} ignored, collection was ingested with {backend}")
+    embeddings = get_embeddings(backend)
     
     vector_db = Chroma(
         collection_name=collection_name,
         embedding_function=embeddings,
-        persist_directory=persist_directory
+        client=client,
+        collection_metadata={**COLLECTION_METADATA, "embedding_backend": backend}
     )
-    return vector_db
\ No newline at end of file
+    return vector_db
+
+def flush_vector_index(vector_db):
+    from chromadb.segment import VectorReader
+    manager = vector_db._client._server._manager
+    segment = manager.get_segment(vector_db._collection.id, VectorReader)
+    if getattr(segment, "_index", None) is not None:
+        segment._persist()
@@ -0,0 +1,140 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+from langchain_core.embeddings import Embeddings
+
+MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+ONNX_MODEL_DIR = os.path.join(os.getcwd(), "onnx_minilm")
+ONNX_MODEL_FILE = "model_quantized.onnx"
+EMBEDDING_DIM = 384
+MAX_SEQ_LENGTH = 128
+
+def export_quantized_model(model_name: str = MODEL_NAME, output_dir: str = ONNX_MODEL_DIR):
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    print(f"Exporting {model_name} to ONNX int8 at {output_dir}...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    )
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_name: str = MODEL_NAME, model_dir: str = ONNX_MODEL_DIR,
+                 file_name: str = ONNX_MODEL_FILE, batch_size: int = 32, max_length: int = MAX_SEQ_LENGTH,
+                 num_threads: Optional[int] = None):
+        model_path = os.path.join(model_dir, file_name)
+        if not os.path.exists(model_path):
+            export_quantized_model(model_name, model_dir)
+
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.tokenizer_lock = threading.Lock()
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with self.tokenizer_lock:
+            encoded = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+        inputs = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return np.concatenate([
+            self._encode(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, base: Embeddings, maxsize: int = 4096, batch_size: int = 32):
+        self.base = base
+        self.batch_size = batch_size
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        return " ".join(text.split())
+
+    @staticmethod
+    def _unit(vector) -> tuple:
+        vector = np.asarray(vector, dtype=np.float32)
+        return tuple((vector / max(np.linalg.norm(vector), 1e-12)).tolist())
+
+    def _get(self, key: str):
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            return embedding
+
+    def _put(self, key: str, embedding: tuple):
+        with self._lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.normalize_query(text)
+        embedding = self._get(key)
+        if embedding is None:
+            embedding = self._unit(self.base.embed_query(text))
+            self._put(key, embedding)
+        return list(embedding)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.normalize_query(text) for text in texts]
+        embeddings = [self._get(key) for key in keys]
+        missing = {}
+        for key, text, embedding in zip(keys, texts, embeddings):
+            if embedding is None:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, map(self._unit, self.base.embed_documents(list(missing.values())))))
+            for key, embedding in computed.items():
+                self._put(key, embedding)
+            embeddings = [e if e is not None else computed[k] for k, e in zip(keys, embeddings)]
+        return [list(e) for e in embeddings]
+
+    def cache_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "maxsize": self.maxsize}